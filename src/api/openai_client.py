@@ -2,13 +2,41 @@
 OpenAI APIとの通信を行うクライアントモジュール
 """
 
+import atexit
+import importlib.util
+import logging
 import os
+import random
+import threading
+import httpx
 from openai import OpenAI
 import streamlit as st
 import time
+from src.utils.disk_cache import hash_file, hash_text, load_cache, save_cache
+
+logger = logging.getLogger(__name__)
+
+# Chat APIへの1分あたりの最大リクエスト数（全スレッド共通）
+REQUESTS_PER_MINUTE = 500
+
+# 品質チェックで使用するチャットモデル
+CHAT_MODEL = "gpt-4o-mini"
+
+# 文字起こしのモデルと言語（キャッシュキーにも含め、変更時に古い結果を使わない）
+TRANSCRIPTION_MODEL = "whisper-1"
+TRANSCRIPTION_LANGUAGE = "ja"
+
+# リトライ時の待機時間の上限（秒）
+MAX_RETRY_DELAY = 8.0
+
+# h2 未導入の環境ではHTTP/1.1で接続する（httpx は http2=True でImportErrorを送出するため）
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+_rate_limit_lock = threading.Lock()
+_next_request_time = 0.0
 
 def init_openai_client():
-    """OpenAI クライアントを初期化"""
+    """OpenAI クライアントを初期化（クライアント本体と接続テストの成功はプロセス内で共有）"""
     try:
         # 環境変数からAPIキーを取得
         api_key = os.getenv("OPENAI_API_KEY")
@@ -42,21 +70,12 @@ def init_openai_client():
         st.write(f"DEBUG: APIキーの長さ: {len(api_key) if api_key else 0}")
         
         try:
-            # OpenAIクライアントの初期化（必要最小限のパラメータのみ）
-            client = OpenAI(
-                api_key=api_key,
-                # timeout=60,  # 必要に応じてタイムアウトを設定
-            )
+            # OpenAIクライアントの初期化
+            client = _create_openai_client(api_key)
             
-            # 簡単な接続テスト（models.listは重いのでより軽いテストに変更）
+            # 簡単な接続テスト（成功した場合のみキャッシュされ、失敗時は次回の再実行で再試行する）
             try:
-                # より軽量なテスト：短いチャット応答で接続確認
-                test_response = client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[{"role": "user", "content": "test"}],
-                    max_tokens=1,
-                    temperature=0
-                )
+                _test_connection(api_key, client)
                 
                 # 成功メッセージ
                 st.success("✅ OpenAI APIに正常に接続しました")
@@ -77,7 +96,7 @@ def init_openai_client():
                   <br>エラー: {str(type_error)}
                   <br><br>解決方法:
                   <br>1. OpenAI SDKを最新版に更新: pip install --upgrade openai
-                  <br>2. requirements.txtで openai==1.16.0 以上を指定
+                  <br>2. requirements.txtで openai==1.40.0 以上を指定
                 </div>
                 """, unsafe_allow_html=True)
             else:
@@ -111,75 +130,110 @@ def init_openai_client():
         st.write(f"DEBUG: エラー詳細: {str(e)}")
         st.stop()
 
-def chat_with_retry(client, system_prompt, user_prompt, temperature=0.0, expect_json=False, model="gpt-4o-mini", max_retries=3):
+@st.cache_resource(show_spinner=False)
+def _create_openai_client(api_key):
+    """OpenAI クライアントを作成（プロセス内で1度だけ実行。UI表示は行わない）"""
+    # 並列リクエストが少数のHTTP/2接続上で多重化されるよう、接続プールを持つHTTPクライアントを共有する
+    http_client = httpx.Client(
+        http2=HTTP2_AVAILABLE,
+        timeout=httpx.Timeout(600.0, connect=5.0),
+        limits=httpx.Limits(max_connections=64, max_keepalive_connections=32)
+    )
+    atexit.register(http_client.close)
+    return OpenAI(
+        api_key=api_key,
+        http_client=http_client,
+    )
+
+@st.cache_resource(show_spinner=False)
+def _test_connection(api_key, _client):
+    """接続テスト（models.listは重いので短いチャット応答で確認。失敗時は例外を送出しキャッシュしない）"""
+    # クライアントはハッシュ対象外のため、APIキーをキーにしてキーが変わったら再テストする
+    _client.chat.completions.create(
+        model="gpt-3.5-turbo",
+        messages=[{"role": "user", "content": "test"}],
+        max_tokens=1,
+        temperature=0
+    )
+    return True
+
+def chat_with_retry(client, system_prompt, user_prompt, temperature=0.0, expect_json=False, model=CHAT_MODEL, max_retries=3, response_format=None):
     """OpenAI Chat APIを使用してプロンプトの応答を取得（リトライ機能付き）"""
+    # リクエスト内容はリトライ間で変わらないため、ループの外で1度だけ組み立てる
+    # （システムプロンプトを先頭に固定し、OpenAI側のプロンプトキャッシュが効くようにする）
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt}
+    ]
+    # JSONを期待する場合はJSONモードを指定し、前後の説明文やコードブロックを出力させない
+    # （response_format を直接渡した場合はそちらを優先。JSONスキーマの指定などに使用）
+    if response_format is None:
+        response_format = {"type": "json_object"} if expect_json else {"type": "text"}
+    
     retry_count = 0
     while retry_count < max_retries:
         try:
+            _wait_for_rate_limit()
+            
             response = client.chat.completions.create(
                 model=model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=temperature
+                messages=messages,
+                temperature=temperature,
+                response_format=response_format
             )
             return response.choices[0].message.content
         except Exception as e:
             retry_count += 1
             if retry_count == max_retries:
-                st.markdown(f"""
-                <div class="error-box">
-                  ❌ APIリクエストに失敗しました（{max_retries}回試行）: {str(e)}
-                </div>
-                """, unsafe_allow_html=True)
+                logger.error("APIリクエストに失敗しました（%d回試行）: %s", max_retries, e)
                 return None
-            st.markdown(f"""
-            <div class="warning-box">
-              ⚠️ APIリクエストに失敗しました。リトライします ({retry_count}/{max_retries})...
-            </div>
-            """, unsafe_allow_html=True)
-            time.sleep(1)  # リトライ前に少し待機
+            logger.warning("APIリクエストに失敗しました。リトライします (%d/%d): %s", retry_count, max_retries, e)
+            # リトライ前の待機（指数バックオフ＋ジッターで、並列リクエストの再送が重ならないようにする）
+            time.sleep(min(MAX_RETRY_DELAY, 2 ** (retry_count - 1)) + random.uniform(0, 0.5))
 
-def transcribe_audio(audio_file, client):
-    """音声ファイルを文字起こし"""
+def _wait_for_rate_limit():
+    """リクエスト間隔が REQUESTS_PER_MINUTE を超えないよう待機（スレッドセーフ）"""
+    global _next_request_time
+    
+    with _rate_limit_lock:
+        now = time.monotonic()
+        wait_time = max(0.0, _next_request_time - now)
+        _next_request_time = max(now, _next_request_time) + 60.0 / REQUESTS_PER_MINUTE
+    
+    if wait_time > 0:
+        time.sleep(wait_time)
+
+def request_transcription(audio_file, client):
+    """音声ファイルを文字起こし（UI表示なし・失敗時は例外を送出）"""
+    import shutil
     import tempfile
 
+    # 同じ音声の文字起こし結果があれば再利用
+    cache_key = hash_text(TRANSCRIPTION_MODEL, TRANSCRIPTION_LANGUAGE, hash_file(audio_file))
+    cached = load_cache("transcripts", cache_key)
+    if cached is not None:
+        return cached["text"]
+
     tmp_file_path = None
     try:
-        # 処理ステータス表示
-        status_msg = st.empty()
-        status_msg.markdown("""
-        <div class="info-box">
-          🎤 音声ファイルを文字起こし中です。これには数分かかる場合があります...
-        </div>
-        """, unsafe_allow_html=True)
-        
+        # getvalue()でメモリ上に全体を複製せず、1MBずつ一時ファイルへ書き出す
+        audio_file.seek(0)
         with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as tmp_file:
-            tmp_file.write(audio_file.getvalue())
+            shutil.copyfileobj(audio_file, tmp_file, length=1024 * 1024)
             tmp_file_path = tmp_file.name
         
         with open(tmp_file_path, "rb") as audio:
-            try:
-                transcript = client.audio.transcriptions.create(
-                    file=audio,
-                    model="whisper-1",
-                    language="ja",
-                    response_format="text"
-                )
-                
-                # 完了表示をクリア
-                status_msg.empty()
-                return transcript
-            except Exception as e:
-                status_msg.markdown(f"""
-                <div class="error-box">
-                  ❌ 文字起こし処理に失敗しました: {str(e)}
-                </div>
-                """, unsafe_allow_html=True)
-                st.write(f"DEBUG: 文字起こしエラー詳細: {str(e)}")
-                return None
+            transcript = client.audio.transcriptions.create(
+                file=audio,
+                model=TRANSCRIPTION_MODEL,
+                language=TRANSCRIPTION_LANGUAGE,
+                response_format="text"
+            )
+        
+        if transcript:
+            save_cache("transcripts", cache_key, {"text": transcript})
+        return transcript
     finally:
         # 一時ファイルの削除
         if tmp_file_path and os.path.exists(tmp_file_path):
-            os.unlink(tmp_file_path)
\ No newline at end of file
+            os.unlink(tmp_file_path)
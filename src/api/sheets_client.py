@@ -7,12 +7,15 @@ import json
 import streamlit as st
 import gspread
 from gspread import Cell
+from gspread.utils import absolute_range_name, rowcol_to_a1
 from google.oauth2.service_account import Credentials
 from datetime import datetime
+from src.utils import json_utils
 import time
 
+@st.cache_resource(show_spinner=False)
 def init_google_sheets():
-    """Google Sheets クライアントを初期化"""
+    """Google Sheets クライアントを初期化（プロセス内で1度だけ実行）"""
     try:
         current_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
         credentials_path = os.path.join(current_dir, "credentials.json")
@@ -125,8 +128,13 @@ def write_to_sheets(gc, transcript_text, filename):
         """, unsafe_allow_html=True)
         return False
 
-def get_target_rows(gc, max_rows=50):
-    """品質チェック対象の行を取得"""
+def open_worksheet(gc):
+    """品質チェック用のワークシートを開く"""
+    spreadsheet = gc.open("テレアポチェックシート")
+    return spreadsheet.worksheet("Difyテスト")
+
+def get_target_rows(worksheet, max_rows=50):
+    """品質チェック対象の行を取得（シート全体を1回のAPI呼び出しで読み込む）"""
     try:
         status_msg = st.empty()
         status_msg.markdown("""
@@ -135,9 +143,6 @@ def get_target_rows(gc, max_rows=50):
         </div>
         """, unsafe_allow_html=True)
         
-        spreadsheet = gc.open("テレアポチェックシート")
-        worksheet = spreadsheet.worksheet("Difyテスト")
-        
         # すべての値を取得
         all_values = worksheet.get_all_values()
         
@@ -167,43 +172,46 @@ def get_target_rows(gc, max_rows=50):
         return [], []
 
 def update_quality_check_results(worksheet, header_map, results_batch):
-    """品質チェック結果をスプレッドシートに一括更新"""
-    try:
-        cells_to_update = []
-        
-        for row_index, results in results_batch:
-            try:
-                # JSONから各カラムの値を取得
-                results_dict = json.loads(results)
-                
-                # ヘッダーマップに基づいて各列にデータを配置
-                for header_text, col_index in header_map.items():
-                    if header_text in results_dict:
-                        value = results_dict[header_text]
-                        # リスト型の場合は文字列に変換
-                        if isinstance(value, list):
-                            value = ", ".join(value)
-                        cells_to_update.append(Cell(row=row_index, col=col_index, value=value))
-                
-                # 処理完了フラグを追加
-                cells_to_update.append(Cell(row=row_index, col=4, value="完了"))
-                
-            except Exception as e:
-                st.markdown(f"""
-                <div class="error-box">
-                  ❌ 行 {row_index} の処理中にエラー: {str(e)}
-                </div>
-                """, unsafe_allow_html=True)
-        
-        if cells_to_update:
-            worksheet.update_cells(cells_to_update)
-            return True
-        
-        return False
-    except Exception as e:
-        st.markdown(f"""
-        <div class="error-box">
-          ❌ 品質チェック結果の更新に失敗しました: {str(e)}
-        </div>
-        """, unsafe_allow_html=True)
-        return False 
\ No newline at end of file
+    """品質チェック結果をスプレッドシートに一括更新（1回のbatchUpdateで書き込む・UI表示なし）"""
+    # 書き込み専用スレッドから呼ばれるため st.* には描画せず、
+    # 解析できずに書き込まなかった行を {行番号: エラー内容} で返す（API呼び出しの失敗は例外を送出）
+    data = []
+    failed_rows = {}
+    
+    for row_index, results in results_batch:
+        try:
+            # JSONから各カラムの値を取得
+            results_dict = json_utils.loads(results)
+            
+            # ヘッダーマップに基づいて各列にデータを配置
+            row_data = []
+            for header_text, col_index in header_map.items():
+                if header_text in results_dict:
+                    value = results_dict[header_text]
+                    # リスト型の場合は文字列に変換
+                    if isinstance(value, list):
+                        value = ", ".join(value)
+                    row_data.append(_cell_range(worksheet, row_index, col_index, value))
+            
+            # 処理完了フラグを追加
+            row_data.append(_cell_range(worksheet, row_index, 4, "完了"))
+            data.extend(row_data)
+            
+        except Exception as e:
+            failed_rows[row_index] = f"結果の解析に失敗しました: {str(e)}"
+    
+    if data:
+        # 離れた行もまとめて1リクエストで更新（間の空セルは送らない）
+        worksheet.spreadsheet.values_batch_update(body={
+            "valueInputOption": "RAW",
+            "data": data
+        })
+    
+    return failed_rows
+
+def _cell_range(worksheet, row, col, value):
+    """values_batch_update用の単一セル更新データを作成"""
+    return {
+        "range": absolute_range_name(worksheet.title, rowcol_to_a1(row, col)),
+        "values": [[value]]
+    }
\ No newline at end of file
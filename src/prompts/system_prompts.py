@@ -291,13 +291,85 @@ SYSTEM_PROMPTS = {
     'to_json': (
         'あなたはSFIDA X社のテレアポ音声記録を判定し、スプレッドシートにぴったり収まるJSONを出力するプロフェッショナルです。\n\n'
         '以下の「インプット」を解析して、\n\n'
-        '1. 「テレアポ担当者名」は A 列、\n'
-        '2. ルールごとの「判定」は B～列以降に列名（日本語タイトル）をそのままキー名に、\n'
-        '3. すべての「報告」をまとめて箇条書きの配列（JSONの配列）として、最後のキー `"報告まとめ"` に格納\n\n'
+        '1. 「テレアポ担当者名」を最初のキー `"テレアポ担当者名"` に、\n'
+        '2. すべての「報告」をまとめて箇条書きの配列（JSONの配列）として、2番目のキー `"報告まとめ"` に、\n'
+        '3. ルールごとの「判定」はその後に列名（日本語タイトル）をそのままキー名に格納\n\n'
         '報告まとめに関しては、重要度を判断し、最大5つのポイントに絞ってください。\n\n'
         '**重要**: 各チェック項目の判定結果は必ず「問題あり」または「問題なし」のどちらかを設定してください。判定が不明確な場合や情報が不足している場合は「処理失敗」と設定してください。\n\n'
         'する形式で、**純粋なJSONオブジェクト**だけを返してください。\n'
         '他のテキストや説明は一切不要です。\n\n'
         '必ず全てのチェック項目（社名や担当者名を名乗らない、アプローチで販売店名、ソフト名の先出し、同業他社の悪口等、運転中や電車内でも無理やり続ける、2回断られても食い下がる、暴言・悪口・脅迫・逆上、情報漏洩、共犯（教唆・幇助）、通話対応（無言電話／ガチャ切り）、呼び方、ロングコール、当社の電話お断り、しつこい・何度も電話がある、お客様専用電話番号と言われる、口調を注意された、怒らせた、暴言を受けた、通報する、営業お断り、事務員に対して代表者のことを「社長」「オーナー」「代表」、一人称が「僕」「自分」「俺」、「弊社」のことを「うち」「僕ら」と言う、謝罪が「すみません」「ごめんなさい」、口調や態度が失礼、会話が成り立っていない、残債の「下取り」「買い取り」トーク、嘘・真偽不明、その他問題）に対して判定結果を設定してください。'
     )
-} 
\ No newline at end of file
+} 
+
+# 各チェックプロンプトが判定するルール（スプレッドシートの列名と同じ表記・順序）
+CHECK_RULES = {
+    'company_name_check': (
+        "社名や担当者名を名乗らない",
+    ),
+    'teleapo_response_check': (
+        "アプローチで販売店名、ソフト名の先出し",
+        "同業他社の悪口等",
+        "運転中や電車内でも無理やり続ける",
+        "2回断られても食い下がる",
+        "暴言・悪口・脅迫・逆上",
+        "情報漏洩",
+        "共犯（教唆・幇助）",
+        "通話対応（無言電話／ガチャ切り）",
+        "呼び方",
+    ),
+    'longcall_check': (
+        "ロングコール",
+    ),
+    'customer_reaction_check': (
+        "当社の電話お断り",
+        "しつこい・何度も電話がある",
+        "お客様専用電話番号と言われる",
+        "口調を注意された",
+        "怒らせた",
+        "暴言を受けた",
+        "通報する",
+        "営業お断り",
+    ),
+    'manner_check': (
+        "事務員に対して代表者のことを「社長」「オーナー」「代表」",
+        "一人称が「僕」「自分」「俺」",
+        "「弊社」のことを「うち」「僕ら」と言う",
+        "謝罪が「すみません」「ごめんなさい」",
+        "口調や態度が失礼",
+        "会話が成り立っていない",
+        "残債の「下取り」「買い取り」トーク",
+        "嘘・真偽不明",
+        "その他問題",
+    ),
+}
+
+# 品質チェック結果のキー（スプレッドシートの列名と同じ順序）
+SPREADSHEET_KEYS = (
+    "テレアポ担当者名",
+    "報告まとめ",
+    *CHECK_RULES['company_name_check'],
+    *CHECK_RULES['teleapo_response_check'],
+    *CHECK_RULES['longcall_check'],
+    "ガチャ切りされた△",  # 現在のワークフローでは判定しない項目
+    *CHECK_RULES['customer_reaction_check'],
+    *CHECK_RULES['manner_check'],
+)
+
+# to_json の出力スキーマ（Structured Outputs の strict モードで全キーを必須にする）
+_JUDGMENT_VALUES = ("問題あり", "問題なし", "処理失敗")
+_JUDGED_KEYS = frozenset(rule for rules in CHECK_RULES.values() for rule in rules)
+
+QUALITY_CHECK_SCHEMA = {
+    "type": "object",
+    "properties": {
+        key: (
+            {"type": "array", "items": {"type": "string"}} if key == "報告まとめ"
+            else {"type": "string", "enum": list(_JUDGMENT_VALUES)} if key in _JUDGED_KEYS
+            else {"type": "string"}
+        )
+        for key in SPREADSHEET_KEYS
+    },
+    "required": list(SPREADSHEET_KEYS),
+    "additionalProperties": False,
+}
@@ -33,14 +33,15 @@ def render_upload_section():
     st.markdown('<div class="section-container upload-section">', unsafe_allow_html=True)
     st.markdown("### 📁 音声ファイルアップロード")
     
-    uploaded_file = st.file_uploader(
-        "mp3ファイルを選択してください（最大25MB）",
+    uploaded_files = st.file_uploader(
+        "mp3ファイルを選択してください（複数選択可・各最大25MB）",
         type=['mp3'],
+        accept_multiple_files=True,
         help="テレアポの録音データをアップロードしてください"
     )
     
     st.markdown('</div>', unsafe_allow_html=True)
-    return uploaded_file
+    return uploaded_files
 
 
 def render_quality_check_section():
@@ -78,13 +79,13 @@ def render_quality_check_section():
     return selected_checkers, batch_size
 
 
-def render_result_section(transcript_text=None):
+def render_result_section(transcript_text=None, filename=None, key="transcript_result"):
     """結果表示セクションを表示"""
     st.markdown('<div class="section-container result-section">', unsafe_allow_html=True)
-    st.markdown("### 📋 処理結果")
+    st.markdown(f"### 📋 処理結果: {filename}" if filename else "### 📋 処理結果")
     
     if transcript_text:
-        st.text_area("文字起こし結果", transcript_text, height=200, key="transcript_result")
+        st.text_area("文字起こし結果", transcript_text, height=200, key=key)
         
         # コピーボタン
         st.markdown(f"""
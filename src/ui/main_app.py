@@ -3,6 +3,7 @@
 """
 
 import streamlit as st
+from concurrent.futures import as_completed
 from src.ui.components import (
     setup_page, 
     render_header, 
@@ -13,9 +14,13 @@ from src.ui.components import (
     show_success_message,
     show_error_message
 )
-from src.api.openai_client import init_openai_client, transcribe_audio
+from src.api.openai_client import init_openai_client, request_transcription
 from src.api.sheets_client import init_google_sheets, write_to_sheets
 from src.utils.batch_processor import run_quality_check_batch
+from src.utils.concurrency import create_executor
+
+# 文字起こしの同時実行数
+MAX_CONCURRENT_TRANSCRIPTIONS = 5
 
 
 def main():
@@ -63,35 +68,86 @@ def _initialize_api_clients():
 def _handle_transcription_tab(clients):
     """文字起こしタブの処理"""
     # 音声アップロードセクション
-    uploaded_file = render_upload_section()
+    uploaded_files = render_upload_section()
     
     # 処理ボタン
     process_button = st.button("🎤 文字起こし開始", type="primary", use_container_width=True)
     
     # 文字起こし処理
-    if process_button and uploaded_file is not None:
-        with st.spinner("🎤 音声ファイルを文字起こし中..."):
+    if process_button and uploaded_files:
+        with st.spinner(f"🎤 {len(uploaded_files)}件の音声ファイルを文字起こし中..."):
             try:
-                # 文字起こし処理
-                transcript_text = transcribe_audio(uploaded_file, clients['openai'])
+                # 文字起こし処理（並列実行）
+                results = _transcribe_all(uploaded_files, clients)
                 
-                if transcript_text:
-                    # 結果表示
-                    render_result_section(transcript_text)
-                    
-                    # Google Sheetsに保存
-                    write_to_sheets(clients['sheets'], transcript_text, uploaded_file.name)
-                    show_success_message("文字起こしが完了し、Google Sheetsに保存されました")
-                else:
-                    show_error_message("文字起こしに失敗しました")
+                for uploaded_file, transcript_text in zip(uploaded_files, results):
+                    if isinstance(transcript_text, Exception):
+                        show_error_message(f"{uploaded_file.name}: 文字起こしに失敗しました: {str(transcript_text)}")
+                    elif transcript_text:
+                        # 結果表示
+                        render_result_section(transcript_text, filename=uploaded_file.name, key=f"transcript_result_{uploaded_file.file_id}")
+                        
+                        # Google Sheetsに保存
+                        write_to_sheets(clients['sheets'], transcript_text, uploaded_file.name)
+                        show_success_message(f"{uploaded_file.name}: 文字起こしが完了し、Google Sheetsに保存されました")
+                    else:
+                        show_error_message(f"{uploaded_file.name}: 文字起こしに失敗しました")
                     
             except Exception as e:
                 show_error_message(f"処理中にエラーが発生しました: {str(e)}")
     
-    elif process_button and uploaded_file is None:
+    elif process_button and not uploaded_files:
         show_error_message("音声ファイルを選択してください")
 
 
+def _transcribe_all(uploaded_files, clients, max_concurrent=MAX_CONCURRENT_TRANSCRIPTIONS):
+    """複数の音声ファイルを並列で文字起こし（結果はアップロード順、失敗時は例外を格納）"""
+    total = len(uploaded_files)
+    results = [None] * total
+    has_error = False
+    
+    # 処理状況はHTMLを使わないステータスコンテナ1つにまとめて表示
+    status = st.status(f"🎤 0/{total} 件完了", expanded=True)
+    
+    # ファイルごとの状況表示（同名ファイルがあっても混ざらないよう位置で対応付ける）
+    with status:
+        file_status = [st.empty() for _ in uploaded_files]
+    for placeholder, uploaded_file in zip(file_status, uploaded_files):
+        placeholder.caption(f"⏳ 待機中: {uploaded_file.name}")
+    
+    # ワーカーは作成済みのファイル別プレースホルダーだけを更新するため、スクリプトコンテキストを引き継ぐ
+    with create_executor(max_concurrent, with_script_context=True) as executor:
+        futures = {
+            executor.submit(_transcribe_file, uploaded_file, clients['openai'], file_status[i]): i
+            for i, uploaded_file in enumerate(uploaded_files)
+        }
+        
+        # 完了順に進捗を更新
+        for completed, future in enumerate(as_completed(futures), start=1):
+            index = futures[future]
+            try:
+                results[index] = future.result()
+                file_status[index].caption(f"✅ 完了: {uploaded_files[index].name}")
+            except Exception as e:
+                results[index] = e
+                has_error = True
+                file_status[index].caption(f"❌ 失敗: {uploaded_files[index].name}")
+            status.update(label=f"🎤 {completed}/{total} 件完了（{uploaded_files[index].name}）")
+    
+    status.update(
+        label=f"🎤 {total}件の文字起こしが完了しました",
+        state="error" if has_error else "complete",
+        expanded=False
+    )
+    return results
+
+
+def _transcribe_file(uploaded_file, openai_client, status_placeholder):
+    """1ファイル分の文字起こし（ワーカースレッドで実行される）"""
+    status_placeholder.caption(f"🎤 文字起こし中: {uploaded_file.name}")
+    return request_transcription(uploaded_file, openai_client)
+
+
 def _handle_quality_check_tab(clients):
     """品質チェックタブの処理"""
     # 品質チェック設定セクション
@@ -4,15 +4,36 @@
 
 import streamlit as st
 import time
+from concurrent.futures import as_completed
+from src.api.openai_client import CHAT_MODEL
+from src.prompts.system_prompts import SYSTEM_PROMPTS, CHECK_RULES, QUALITY_CHECK_SCHEMA
+from src.utils import json_utils
+from src.utils.concurrency import create_executor
+from src.utils.disk_cache import hash_text, load_cache, save_cache
 from src.utils.quality_check import run_workflow
-from src.api.sheets_client import get_target_rows, update_quality_check_results
+from src.api.sheets_client import open_worksheet, get_target_rows, update_quality_check_results
+
+# 品質チェックの同時実行行数
+MAX_WORKERS = 8
+
+# 各行の項目チェックを実行する共有プールのスレッド数（同時実行行数×チェック項目数）
+CHECK_WORKERS = MAX_WORKERS * len(CHECK_RULES)
+
+# 進捗・メトリクス表示の最小更新間隔（秒）
+PROGRESS_UPDATE_INTERVAL = 1.0
+
+# 品質チェック結果キャッシュのバージョン（プロンプト・出力スキーマ・モデルが変わると別キーになり、古い結果を使わない）
+CACHE_VERSION = hash_text(json_utils.dumps(SYSTEM_PROMPTS), json_utils.dumps(QUALITY_CHECK_SCHEMA), CHAT_MODEL)
 
 
 def run_quality_check_batch(gc, client, checker_str, progress_bar, status_text, max_rows=50, batch_size=10):
     """バッチ処理で品質チェックを実行"""
     try:
+        # ワークシートは1度だけ開き、読み込みと書き込みで使い回す
+        worksheet = open_worksheet(gc)
+        
         # 処理対象の行を取得
-        header_row, target_rows = get_target_rows(gc, max_rows)
+        header_row, target_rows = get_target_rows(worksheet, max_rows)
         
         if not target_rows:
             st.markdown('<div class="info-box">処理対象のデータがありません</div>', unsafe_allow_html=True)
@@ -29,7 +50,7 @@ def run_quality_check_batch(gc, client, checker_str, progress_bar, status_text,
         
         # バッチ処理実行
         _process_batch(
-            target_rows, checker_str, client, gc, 
+            target_rows, checker_str, client, worksheet, header_map,
             batch_size, progress_bar, status_text, metrics_containers
         )
         
@@ -61,21 +82,11 @@ def _setup_metrics_display(total_rows):
     
     with metrics_cols[0]:
         processed_metric = st.empty()
-        processed_metric.markdown(f"""
-        <div class="metric-card">
-          <h3>✅ 処理済み</h3>
-          <p>0/{total_rows}</p>
-        </div>
-        """, unsafe_allow_html=True)
+        processed_metric.metric("✅ 処理済み", f"0/{total_rows}")
         
     with metrics_cols[1]:
         success_metric = st.empty()
-        success_metric.markdown(f"""
-        <div class="metric-card">
-          <h3>🎯 成功率</h3>
-          <p>0%</p>
-        </div>
-        """, unsafe_allow_html=True)
+        success_metric.metric("🎯 成功率", "0%")
     
     return {
         'processed': processed_metric,
@@ -83,107 +94,122 @@ def _setup_metrics_display(total_rows):
     }
 
 
-def _process_batch(target_rows, checker_str, client, gc, batch_size, 
+def _process_batch(target_rows, checker_str, client, worksheet, header_map, batch_size, 
                   progress_bar, status_text, metrics_containers):
-    """実際のバッチ処理を実行"""
+    """実際のバッチ処理を実行（行単位で並列実行）"""
     results_batch = []
+    write_futures = {}
     total_processed = 0
     total_success = 0
+    total_rows = len(target_rows)
+    last_update = 0.0
+    has_error = False
     
-    for i, (row_index, row) in enumerate(target_rows):
-        try:
-            # テキストとファイル名を取得
-            raw_transcript = row[0] if row else ""
-            if not raw_transcript:
-                continue
+    # 処理状況はHTMLを使わないステータスコンテナ1つにまとめて表示
+    processing_status = st.status("🔍 品質チェックを実行中...", expanded=False)
+    
+    # 各行の項目チェックは1つの共有プールで実行し、行ごとにプールを作らない
+    # スプレッドシート書き込みは専用スレッドで行い、LLM結果の集計を止めない
+    with create_executor(MAX_WORKERS) as executor, create_executor(CHECK_WORKERS) as check_executor, \
+            create_executor(1) as writer:
+        futures = {
+            executor.submit(_check_row, row, checker_str, client, check_executor): (
+                row_index, row[1] if len(row) > 1 else f"行 {row_index}"
+            )
+            for row_index, row in target_rows
+            if row and row[0]
+        }
+        
+        # 完了順に結果を集計
+        for completed, future in enumerate(as_completed(futures), start=1):
+            row_index, filename = futures[future]
+            try:
+                result_json, issues = future.result()
                 
-            filename = row[1] if len(row) > 1 else f"行 {row_index}"
-            
-            # 現在処理中のファイル表示
-            current_file = _show_current_processing(filename)
-            
-            # 品質チェックワークフロー実行
-            result_json = run_workflow(raw_transcript, checker_str, client)
-            
-            if result_json:
-                results_batch.append((row_index, result_json))
-                total_success += 1
-            
-            # 現在処理中の表示をクリア
-            current_file.empty()
-            total_processed += 1
-            
-            # メトリクス更新
-            _update_metrics(metrics_containers, total_processed, total_success, len(target_rows))
-            
-            # バッチサイズに達した場合、または最後の処理の場合にスプレッドシート更新
-            if len(results_batch) >= batch_size or i == len(target_rows) - 1:
-                if results_batch:
-                    _update_spreadsheet_batch(gc, results_batch)
+                # 失敗したステップはステータスコンテナ内にまとめて表示（描画はメインスレッドのみで行う）
+                for issue in issues:
+                    processing_status.write(f"⚠️ 行 {row_index}（{filename}）: {issue}")
+                    has_error = True
+                
+                if result_json:
+                    results_batch.append((row_index, result_json))
+                    total_success += 1
+                total_processed += 1
+                
+                # バッチサイズに達した場合にスプレッドシート更新
+                if len(results_batch) >= batch_size:
+                    _submit_write(writer, write_futures, worksheet, header_map, results_batch)
                     results_batch = []
+                
+            except Exception as e:
+                processing_status.write(f"❌ 行 {row_index}（{filename}）の処理エラー: {str(e)}")
+                has_error = True
             
-            # 進捗更新
-            progress = (i + 1) / len(target_rows)
-            progress_bar.progress(progress)
-            status_text.markdown(
-                f"<p style='text-align: center; font-weight: 500;'>{i + 1}/{len(target_rows)} 処理完了</p>", 
-                unsafe_allow_html=True
-            )
-            
+            # 進捗・メトリクス更新（完了が集中しても一定間隔に間引く。最後の1件は必ず反映）
+            now = time.monotonic()
+            if completed == len(futures) or now - last_update >= PROGRESS_UPDATE_INTERVAL:
+                _update_metrics(metrics_containers, total_processed, total_success, total_rows)
+                processing_status.update(label=f"🔍 {completed}/{len(futures)} 件完了（最新: {filename}）")
+                progress_bar.progress(completed / len(futures))
+                status_text.markdown(
+                    f"<p style='text-align: center; font-weight: 500;'>{completed}/{len(futures)} 処理完了</p>", 
+                    unsafe_allow_html=True
+                )
+                last_update = now
+    
+        # 残りの結果を反映（with を抜ける時点で書き込み完了を待つ）
+        if results_batch:
+            _submit_write(writer, write_futures, worksheet, header_map, results_batch)
+    
+    # 書き込み結果はメインスレッドで確認し、書き込めなかった行は成功数から除く
+    filenames = dict(futures.values())
+    for write_future, row_indices in write_futures.items():
+        try:
+            failed_rows = write_future.result()
         except Exception as e:
-            st.error(f"行 {row_index} の処理エラー: {str(e)}")
-            continue
+            failed_rows = dict.fromkeys(row_indices, f"スプレッドシート更新エラー: {str(e)}")
+        for row_index, message in failed_rows.items():
+            processing_status.write(f"❌ 行 {row_index}（{filenames[row_index]}）: {message}")
+        total_success -= len(failed_rows)
+        has_error = has_error or bool(failed_rows)
+    if write_futures:
+        _update_metrics(metrics_containers, total_processed, total_success, total_rows)
+    
+    # 失敗した行があればエラー状態で展開し、成功したように見せない
+    processing_status.update(
+        label=f"🔍 {len(futures)}件の品質チェックが完了しました",
+        state="error" if has_error else "complete",
+        expanded=has_error
+    )
 
 
-def _show_current_processing(filename):
-    """現在処理中のファイル名を表示"""
-    current_file = st.empty()
-    current_file.markdown(f"""
-    <div style="text-align: center; padding: 0.5rem; background-color: rgba(40,40,40,0.7); border-radius: 5px; margin: 1rem 0;">
-      <p style="margin: 0; font-weight: 500;">🔍 現在処理中: {filename}</p>
-    </div>
-    """, unsafe_allow_html=True)
-    return current_file
+def _check_row(row, checker_str, client, check_executor):
+    """1行分の品質チェックを実行（ワーカースレッドで実行されるため st.* には描画しない）"""
+    raw_transcript = row[0]
+    
+    # 同じ文字起こし・担当者での結果があれば再利用（再実行時にAPI呼び出しを省く）
+    cache_key = hash_text(CACHE_VERSION, checker_str, raw_transcript)
+    cached = load_cache("quality_checks", cache_key)
+    if cached is not None:
+        return cached["result"], []
+    
+    # 品質チェックワークフロー実行
+    result_json, issues = run_workflow(raw_transcript, checker_str, client, check_executor)
+    # いずれかのステップが失敗した結果はキャッシュせず、次回の実行で再試行する
+    if result_json and not issues:
+        save_cache("quality_checks", cache_key, {"result": result_json})
+    return result_json, issues
 
 
 def _update_metrics(metrics_containers, processed, success, total):
     """メトリクス表示を更新"""
     success_rate = (success / processed * 100) if processed > 0 else 0
     
-    metrics_containers['processed'].markdown(f"""
-    <div class="metric-card">
-      <h3>✅ 処理済み</h3>
-      <p>{processed}/{total}</p>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    metrics_containers['success'].markdown(f"""
-    <div class="metric-card">
-      <h3>🎯 成功率</h3>
-      <p>{success_rate:.1f}%</p>
-    </div>
-    """, unsafe_allow_html=True)
-
-
-def _update_spreadsheet_batch(gc, results_batch):
-    """バッチ単位でスプレッドシートを更新"""
-    batch_status = st.empty()
-    batch_status.markdown("""
-    <div class="info-box">
-      ⏳ Googleスプレッドシートを更新中...
-    </div>
-    """, unsafe_allow_html=True)
-    
-    try:
-        spreadsheet = gc.open("テレアポチェックシート")
-        update_quality_check_results(spreadsheet, results_batch)
-        time.sleep(1)  # API制限を避けるための待機
-        batch_status.empty()
-    except Exception as e:
-        batch_status.markdown(f"""
-        <div class="error-box">
-          ❌ スプレッドシート更新エラー: {str(e)}
-        </div>
-        """, unsafe_allow_html=True)
-        time.sleep(2)
-        batch_status.empty() 
\ No newline at end of file
+    metrics_containers['processed'].metric("✅ 処理済み", f"{processed}/{total}")
+    metrics_containers['success'].metric("🎯 成功率", f"{success_rate:.1f}%")
+
+
+def _submit_write(writer, write_futures, worksheet, header_map, results_batch):
+    """スプレッドシート更新を書き込みスレッドに投入（結果はメインスレッドで確認する）"""
+    future = writer.submit(update_quality_check_results, worksheet, header_map, results_batch)
+    write_futures[future] = [row_index for row_index, _ in results_batch]
@@ -0,0 +1,22 @@
+"""
+ワーカースレッドのプールを作成するモジュール
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+
+def create_executor(max_workers, with_script_context=False):
+    """スレッドプールを作成（with_script_context=True の場合のみワーカーから st.* を呼び出せる）"""
+    if not with_script_context:
+        return ThreadPoolExecutor(max_workers=max_workers)
+    
+    # 呼び出し元（スクリプト実行スレッド）のコンテキストを各ワーカーに設定する
+    # Streamlit はメインコンテナへの要素追加をスレッド間で排他しないため、
+    # 呼び出し元が作成済みのプレースホルダーを更新する用途に限って使う
+    ctx = get_script_run_ctx()
+    return ThreadPoolExecutor(
+        max_workers=max_workers,
+        initializer=add_script_run_ctx,
+        initargs=(None, ctx)
+    )
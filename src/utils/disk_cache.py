@@ -0,0 +1,108 @@
+"""
+処理結果をローカルディスクにキャッシュするモジュール
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+# キャッシュの保存先
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".telecheck", "cache")
+
+# キャッシュの保持期間（秒）。通話内容を含むため、期限切れのエントリは削除する
+CACHE_MAX_AGE = 7 * 24 * 60 * 60
+
+# 期限切れエントリの削除を実行済みの名前空間（プロセス内で1度だけ走査する）
+_pruned_namespaces = set()
+
+
+def hash_file(file_obj, chunk_size=1024 * 1024):
+    """ファイル内容のSHA-256ハッシュを計算（読み込み位置は先頭に戻す）"""
+    file_obj.seek(0)
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: file_obj.read(chunk_size), b""):
+        digest.update(chunk)
+    file_obj.seek(0)
+    return digest.hexdigest()
+
+
+def hash_text(*parts):
+    """文字列のSHA-256ハッシュを計算（複数指定時は区切り文字で連結）"""
+    return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()
+
+
+def load_cache(namespace, key):
+    """キャッシュを読み込む（存在しない・壊れている・期限切れの場合はNone）"""
+    if not _cache_enabled():
+        return None
+    
+    path = _cache_path(namespace, key)
+    try:
+        if time.time() - os.path.getmtime(path) > CACHE_MAX_AGE:
+            os.unlink(path)
+            return None
+    except OSError:
+        return None
+    
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, EOFError, ValueError):
+        return None
+
+
+def save_cache(namespace, key, data):
+    """キャッシュを書き込む（失敗しても処理は継続）"""
+    if not _cache_enabled():
+        return
+    
+    _prune_expired(namespace)
+    path = _cache_path(namespace, key)
+    tmp_path = None
+    try:
+        cache_dir = os.path.dirname(path)
+        os.makedirs(cache_dir, exist_ok=True)
+        # 書き込み途中のファイルを読まないよう、一時ファイル経由で置き換える
+        # （同じキーを複数スレッドが同時に書いても衝突しないよう、一時ファイル名は毎回一意にする）
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(fd, 'wb') as raw, gzip.open(raw, 'wt', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        tmp_path = None
+    except OSError:
+        pass
+    finally:
+        if tmp_path and os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def _cache_enabled():
+    """環境変数 TELECHECK_DISABLE_CACHE=1 でキャッシュの読み書きを行わない（.env の読み込み後に判定する）"""
+    return os.getenv("TELECHECK_DISABLE_CACHE", "").lower() not in ("1", "true", "yes")
+
+
+def _prune_expired(namespace):
+    """名前空間内の期限切れエントリを削除（プロセス内で1度だけ実行）"""
+    if namespace in _pruned_namespaces:
+        return
+    _pruned_namespaces.add(namespace)
+    
+    cutoff = time.time() - CACHE_MAX_AGE
+    try:
+        with os.scandir(os.path.join(CACHE_DIR, namespace)) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file() and entry.stat().st_mtime < cutoff:
+                        os.unlink(entry.path)
+                except OSError:
+                    pass
+    except OSError:
+        pass
+
+
+def _cache_path(namespace, key):
+    """キャッシュファイルのパスを取得"""
+    return os.path.join(CACHE_DIR, namespace, f"{key}.json.gz")
@@ -0,0 +1,23 @@
+"""
+JSONのシリアライズ/デシリアライズを行うモジュール（orjsonがあれば使用）
+"""
+
+try:
+    import orjson
+except ImportError:  # orjson未導入の環境では標準ライブラリで代替
+    orjson = None
+    import json
+
+
+def dumps(obj):
+    """インデント付き・日本語そのままのJSON文字列に変換"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj, ensure_ascii=False, indent=2)
+
+
+def loads(text):
+    """JSON文字列をPythonオブジェクトに変換"""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
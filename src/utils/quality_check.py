@@ -2,14 +2,35 @@
 品質チェックのコアワークフローを実装するモジュール（Dify互換版）
 """
 
-import streamlit as st
-import json
-from src.prompts.system_prompts import SYSTEM_PROMPTS
+import itertools
+import logging
+import re
+from functools import lru_cache
+from concurrent.futures import as_completed
+from src.prompts.system_prompts import SYSTEM_PROMPTS, CHECK_RULES, SPREADSHEET_KEYS, QUALITY_CHECK_SCHEMA
 from src.api.openai_client import chat_with_retry
+from src.utils import json_utils
+
+logger = logging.getLogger(__name__)
+
+# チェック結果テキストのルール行（▪️/■/●で始まる）と判定行（「判定」「結果」を含む）
+_JUDGMENT_LINE_RE = re.compile(
+    r'^[^\S\n]*(?:(?P<rule>(?:▪️|■|●).*)|(?P<judgment>.*(?:判定|結果).*))$',
+    re.MULTILINE
+)
+_RULE_MARKER_RE = re.compile(r'▪️|■|●')
+
+# 「報告」を含む行のコロン以降（\x1e 区切りで連結した各テキストについて、最終行は対象外）
+_REPORT_RE = re.compile(r'(?:\A|(?<=[\n\x1e]))(?=[^\n\x1e]*報告)[^:\n\x1e]*:([^\n\x1e]*)\n')
+
+@lru_cache(maxsize=128)
+def _format_prompt(key, checker_str):
+    """担当者名を埋め込んだシステムプロンプトを取得（同じ組み合わせは再利用）"""
+    return SYSTEM_PROMPTS[key].format(checker=checker_str)
 
 def node_replace(input_text, checker_str, client):
     """固有名詞を置換するノード（Dify互換）"""
-    prompt = SYSTEM_PROMPTS['replace'].format(checker=checker_str)
+    prompt = _format_prompt('replace', checker_str)
     return chat_with_retry(client, prompt, input_text)
 
 def node_speaker_separation(text_fixed, client):
@@ -17,29 +38,18 @@ def node_speaker_separation(text_fixed, client):
     prompt = SYSTEM_PROMPTS['speaker']
     return chat_with_retry(client, prompt, text_fixed, expect_json=True)
 
-def node_company_name_check(text_separated, checker_str, client):
-    """社名・担当者名の確認を行うノード（Dify互換）"""
-    prompt = SYSTEM_PROMPTS['company_name_check'].format(checker=checker_str)
-    return chat_with_retry(client, prompt, text_separated)
-
-def node_teleapo_response_check(text_separated, client):
-    """テレアポ担当者の対応チェックを行うノード（Dify互換）"""
-    prompt = SYSTEM_PROMPTS['teleapo_response_check']
-    return chat_with_retry(client, prompt, text_separated)
-
-def node_longcall_check(text_separated, client):
-    """ロングコールチェックを行うノード（Dify互換）"""
-    prompt = SYSTEM_PROMPTS['longcall_check']
-    return chat_with_retry(client, prompt, text_separated)
-
-def node_customer_reaction_check(text_separated, client):
-    """お客様の反応チェックを行うノード（Dify互換）"""
-    prompt = SYSTEM_PROMPTS['customer_reaction_check']
-    return chat_with_retry(client, prompt, text_separated)
-
-def node_manner_check(text_separated, client):
-    """心構え・マナーチェックを行うノード（Dify互換）"""
-    prompt = SYSTEM_PROMPTS['manner_check']
+# 各項目のチェック（3〜7）: (プロンプトキー, 担当者名を埋め込むか)
+_CHECK_STEPS = (
+    ('company_name_check', True),
+    ('teleapo_response_check', False),
+    ('longcall_check', False),
+    ('customer_reaction_check', False),
+    ('manner_check', False),
+)
+
+def _run_check(key, uses_checker, text_separated, checker_str, client):
+    """各項目のチェックを行うノード（Dify互換）"""
+    prompt = _format_prompt(key, checker_str) if uses_checker else SYSTEM_PROMPTS[key]
     return chat_with_retry(client, prompt, text_separated)
 
 def node_concat(company_name_check, teleapo_response_check, longcall_check, customer_reaction_check, manner_check):
@@ -54,146 +64,108 @@ def node_concat(company_name_check, teleapo_response_check, longcall_check, cust
 
 def node_to_json(concatenated, client):
     """結果をJSONに変換するノード（Dify互換）"""
+    # 行ごとに変わる入力はユーザーメッセージに渡し、システムプロンプトを全行で同一に保つ
     prompt = SYSTEM_PROMPTS['to_json']
-    full_prompt = f"{prompt}\n\n#インプット内容\n{concatenated}"
-    return chat_with_retry(client, full_prompt, "", expect_json=True)
+    # スキーマを指定して全キーを必ず出力させる（解析できない場合のみ create_fallback_json を使用）
+    response_format = {
+        "type": "json_schema",
+        "json_schema": {"name": "quality_check_result", "strict": True, "schema": QUALITY_CHECK_SCHEMA},
+    }
+    return chat_with_retry(client, prompt, f"#インプット内容\n{concatenated}", response_format=response_format)
 
-def run_workflow(raw_transcript, checker_str, client):
-    """品質チェックのワークフローを実行（Dify互換版）"""
+def run_workflow(raw_transcript, checker_str, client, check_executor):
+    """品質チェックのワークフローを実行（Dify互換版・UI表示なし）"""
+    # ワーカースレッドから並列に呼ばれるため st.* には描画せず、
+    # (結果JSON, 失敗したステップのメッセージ一覧) を返す（続行できない場合の結果JSONは None）
+    issues = []
     try:
-        workflow_progress = st.progress(0)
-        status_text = st.empty()
-        
         # 入力検証
         if not raw_transcript or not raw_transcript.strip():
-            st.warning("入力テキストが空です")
-            return None
+            return None, ["入力テキストが空です"]
         
         # 1. 固有名詞の置換
-        status_text.markdown("**ステップ 1/9**: 固有名詞の置換")
         text_fixed = node_replace(raw_transcript, checker_str, client)
         if not text_fixed or not text_fixed.strip():
-            st.warning("ステップ1: 固有名詞の置換でエラーが発生しました")
-            return None
-        workflow_progress.progress(1/9)
+            return None, ["ステップ1: 固有名詞の置換でエラーが発生しました"]
 
         # 2. 話者分離
-        status_text.markdown("**ステップ 2/9**: 話者分離")
         text_separated = node_speaker_separation(text_fixed, client)
         if not text_separated or not text_separated.strip():
-            st.warning("ステップ2: 話者分離でエラーが発生しました")
-            return None
-        workflow_progress.progress(2/9)
+            return None, ["ステップ2: 話者分離でエラーが発生しました"]
 
-        # 3. 社名・担当者名チェック
-        status_text.markdown("**ステップ 3/9**: 社名・担当者名チェック")
-        company_name_check = node_company_name_check(text_separated, checker_str, client)
-        if not company_name_check:
-            company_name_check = "チェック失敗"
-        workflow_progress.progress(3/9)
+        # 3〜7. 各項目のチェック（互いに依存しないため、呼び出し元から渡された共有プールで並列実行）
+        check_results = {}
+        futures = {
+            check_executor.submit(_run_check, key, uses_checker, text_separated, checker_str, client): key
+            for key, uses_checker in _CHECK_STEPS
+        }
+        for future in as_completed(futures):
+            try:
+                check_results[futures[future]] = future.result()
+            except Exception as e:
+                logger.warning("チェック %s でエラー: %s", futures[future], e)
+                check_results[futures[future]] = None
         
-        # 4. テレアポ担当者対応チェック
-        status_text.markdown("**ステップ 4/9**: テレアポ担当者対応チェック")
-        teleapo_response_check = node_teleapo_response_check(text_separated, client)
-        if not teleapo_response_check:
-            teleapo_response_check = "チェック失敗"
-        workflow_progress.progress(4/9)
-            
-        # 5. ロングコールチェック
-        status_text.markdown("**ステップ 5/9**: ロングコールチェック")
-        longcall_check = node_longcall_check(text_separated, client)
-        if not longcall_check:
-            longcall_check = "チェック失敗"
-        workflow_progress.progress(5/9)
-            
-        # 6. お客様反応チェック
-        status_text.markdown("**ステップ 6/9**: お客様反応チェック")
-        customer_reaction_check = node_customer_reaction_check(text_separated, client)
-        if not customer_reaction_check:
-            customer_reaction_check = "チェック失敗"
-        workflow_progress.progress(6/9)
-            
-        # 7. 心構え・マナーチェック
-        status_text.markdown("**ステップ 7/9**: 心構え・マナーチェック")
-        manner_check = node_manner_check(text_separated, client)
-        if not manner_check:
-            manner_check = "チェック失敗"
-        workflow_progress.progress(7/9)
+        for key, _ in _CHECK_STEPS:
+            if not check_results[key]:
+                issues.append(f"ステップ3-7: {key} のチェックに失敗しました")
+                check_results[key] = "チェック失敗"
+        
+        company_name_check = check_results['company_name_check']
+        teleapo_response_check = check_results['teleapo_response_check']
+        longcall_check = check_results['longcall_check']
+        customer_reaction_check = check_results['customer_reaction_check']
+        manner_check = check_results['manner_check']
 
         # 8. 結果の連結
-        status_text.markdown("**ステップ 8/9**: 結果の連結")
         concatenated = node_concat(company_name_check, teleapo_response_check, longcall_check, customer_reaction_check, manner_check)
-        workflow_progress.progress(8/9)
 
         # 9. JSONに変換
-        status_text.markdown("**ステップ 9/9**: JSON形式に変換")
         result_json = node_to_json(concatenated, client)
         
         # JSON変換結果の検証
         if result_json:
-            result_json = result_json.strip()
-            # JSON形式でない場合は、手動でJSONを作成
-            if not (result_json.startswith('{') and result_json.endswith('}')):
-                st.warning("JSON変換に失敗したため、手動でJSONを作成します")
-                fallback_json = create_fallback_json(
-                    company_name_check, teleapo_response_check, longcall_check, 
-                    customer_reaction_check, manner_check
-                )
-                result_json = json.dumps(fallback_json, ensure_ascii=False, indent=2)
+            result_json = _extract_json_object(result_json)
+            # JSONとして解釈できない場合は、手動でJSONを作成（書き込み時の解析エラーを防ぐ）
+            if not _is_json_object(result_json):
+                issues.append("JSON変換に失敗したため、手動でJSONを作成しました")
+                result_json = None
         else:
             # API呼び出し失敗時のフォールバック
-            st.warning("JSON変換APIが失敗したため、フォールバックJSONを使用します")
+            issues.append("JSON変換APIが失敗したため、フォールバックJSONを使用しました")
+        
+        if not result_json:
             fallback_json = create_fallback_json(
                 company_name_check, teleapo_response_check, longcall_check, 
                 customer_reaction_check, manner_check
             )
-            result_json = json.dumps(fallback_json, ensure_ascii=False, indent=2)
+            result_json = json_utils.dumps(fallback_json)
         
-        workflow_progress.progress(1.0)
-        
-        # 完了表示をクリア
-        status_text.empty()
-        workflow_progress.empty()
-        
-        return result_json
+        return result_json, issues
         
     except Exception as e:
-        st.error(f"ワークフロー実行エラー: {str(e)}")
+        logger.exception("ワークフロー実行エラー")
         # 完全なエラー時のフォールバック
-        fallback_json = {
-            "テレアポ担当者名": "処理エラー",
-            "報告まとめ": [f"処理エラー: {str(e)}"],
-            "社名や担当者名を名乗らない": "処理エラー",
-            "アプローチで販売店名、ソフト名の先出し": "処理エラー",
-            "同業他社の悪口等": "処理エラー",
-            "運転中や電車内でも無理やり続ける": "処理エラー",
-            "2回断られても食い下がる": "処理エラー",
-            "暴言・悪口・脅迫・逆上": "処理エラー",
-            "情報漏洩": "処理エラー",
-            "共犯（教唆・幇助）": "処理エラー",
-            "通話対応（無言電話／ガチャ切り）": "処理エラー",
-            "呼び方": "処理エラー",
-            "ロングコール": "処理エラー",
-            "ガチャ切りされた△": "処理エラー",
-            "当社の電話お断り": "処理エラー",
-            "しつこい・何度も電話がある": "処理エラー",
-            "お客様専用電話番号と言われる": "処理エラー",
-            "口調を注意された": "処理エラー",
-            "怒らせた": "処理エラー",
-            "暴言を受けた": "処理エラー",
-            "通報する": "処理エラー",
-            "営業お断り": "処理エラー",
-            "事務員に対して代表者のことを「社長」「オーナー」「代表」": "処理エラー",
-            "一人称が「僕」「自分」「俺」": "処理エラー",
-            "「弊社」のことを「うち」「僕ら」と言う": "処理エラー",
-            "謝罪が「すみません」「ごめんなさい」": "処理エラー",
-            "口調や態度が失礼": "処理エラー",
-            "会話が成り立っていない": "処理エラー",
-            "残債の「下取り」「買い取り」トーク": "処理エラー",
-            "嘘・真偽不明": "処理エラー",
-            "その他問題": "処理エラー"
-        }
-        return json.dumps(fallback_json, ensure_ascii=False, indent=2)
+        fallback_json = dict.fromkeys(SPREADSHEET_KEYS, "処理エラー")
+        fallback_json["報告まとめ"] = [f"処理エラー: {str(e)}"]
+        return json_utils.dumps(fallback_json), issues + [f"ワークフロー実行エラー: {str(e)}"]
+
+def _extract_json_object(text):
+    """応答から最初の { から最後の } までを取り出す（```json のコードブロックや前後の説明文を除去）"""
+    start = text.find('{')
+    end = text.rfind('}')
+    if start == -1 or end < start:
+        return text.strip()
+    return text[start:end + 1]
+
+def _is_json_object(text):
+    """文字列がJSONオブジェクトとして解析できるかを判定する（空や { で始まらない応答は解析せずに除外）"""
+    if not text or text[0] != '{' or text[-1] != '}':
+        return False
+    try:
+        return isinstance(json_utils.loads(text), dict)
+    except ValueError:
+        return False
 
 def create_fallback_json(company_name_check, teleapo_response_check, longcall_check, customer_reaction_check, manner_check):
     """フォールバックJSONを作成する関数"""
@@ -207,85 +179,47 @@ def create_fallback_json(company_name_check, teleapo_response_check, longcall_ch
                 担当者名 = line.split(':')[1].strip()
                 break
     
-    # 各チェック結果から判定を抽出
+    # 各チェック結果から判定を抽出（1回の正規表現走査でルール行と判定行を拾う）
     def extract_judgments(text, rules):
-        judgments = {}
+        judgments = dict.fromkeys(rules, "処理失敗")
         if not text:
-            return {rule: "処理失敗" for rule in rules}
+            return judgments
         
-        lines = text.split('\n')
         current_rule = None
-        
-        # デバッグ用：処理するテキストを表示
-        print(f"=== 判定抽出デバッグ ===")
-        print(f"処理対象テキスト: {text[:200]}...")
-        
-        for line in lines:
-            line = line.strip()
-            
-            # ルール名の検出（より柔軟に）
-            if line.startswith('▪️') or line.startswith('■') or line.startswith('●'):
-                current_rule = line.replace('▪️', '').replace('■', '').replace('●', '').strip()
-                print(f"ルール検出: {current_rule}")
+        for match in _JUDGMENT_LINE_RE.finditer(text):
+            # ルール名の検出
+            if match['rule'] is not None:
+                current_rule = _RULE_MARKER_RE.sub('', match['rule']).strip()
             
-            # 判定の検出（より柔軟に）
-            elif current_rule and ('判定' in line or '結果' in line):
-                print(f"判定行検出: {line}")
-                
-                # 問題なし/問題ありの判定（より柔軟に）
-                if '問題なし' in line or '問題無し' in line or 'なし' in line:
+            # 判定の検出（問題なし/問題ありの判定）
+            elif current_rule:
+                line = match['judgment']
+                if 'なし' in line or '問題無し' in line:
                     judgments[current_rule] = "問題なし"
-                    print(f"→ 問題なし")
-                elif '問題あり' in line or '問題有り' in line or 'あり' in line:
+                elif 'あり' in line or '問題有り' in line:
                     judgments[current_rule] = "問題あり"
-                    print(f"→ 問題あり")
                 else:
                     judgments[current_rule] = "判定不明"
-                    print(f"→ 判定不明: {line}")
-        
-        print(f"抽出された判定: {judgments}")
-        
-        # 不足している項目を補完
-        for rule in rules:
-            if rule not in judgments:
-                judgments[rule] = "処理失敗"
-                print(f"補完: {rule} → 処理失敗")
-        
-        print(f"最終判定結果: {judgments}")
-        print("=== デバッグ終了 ===")
         
+        logger.debug("判定抽出結果: %s", judgments)
         return judgments
     
     # 各チェック項目の判定を抽出（実際のスプレッドシート列名に合わせる）
-    company_judgments = extract_judgments(company_name_check, ["社名や担当者名を名乗らない"])
-    teleapo_judgments = extract_judgments(teleapo_response_check, [
-        "アプローチで販売店名、ソフト名の先出し", "同業他社の悪口等", "運転中や電車内でも無理やり続ける",
-        "2回断られても食い下がる", "暴言・悪口・脅迫・逆上", "情報漏洩", "共犯（教唆・幇助）",
-        "通話対応（無言電話／ガチャ切り）", "呼び方"
-    ])
-    longcall_judgments = extract_judgments(longcall_check, ["ロングコール"])
-    customer_judgments = extract_judgments(customer_reaction_check, [
-        "当社の電話お断り", "しつこい・何度も電話がある", "お客様専用電話番号と言われる",
-        "口調を注意された", "怒らせた", "暴言を受けた", "通報する", "営業お断り"
-    ])
-    manner_judgments = extract_judgments(manner_check, [
-        "事務員に対して代表者のことを「社長」「オーナー」「代表」", "一人称が「僕」「自分」「俺」",
-        "「弊社」のことを「うち」「僕ら」と言う", "謝罪が「すみません」「ごめんなさい」",
-        "口調や態度が失礼", "会話が成り立っていない", "残債の「下取り」「買い取り」トーク",
-        "嘘・真偽不明", "その他問題"
-    ])
+    company_judgments = extract_judgments(company_name_check, CHECK_RULES['company_name_check'])
+    teleapo_judgments = extract_judgments(teleapo_response_check, CHECK_RULES['teleapo_response_check'])
+    longcall_judgments = extract_judgments(longcall_check, CHECK_RULES['longcall_check'])
+    customer_judgments = extract_judgments(customer_reaction_check, CHECK_RULES['customer_reaction_check'])
+    manner_judgments = extract_judgments(manner_check, CHECK_RULES['manner_check'])
     
-    # 報告まとめを作成
-    報告まとめ = []
+    # 報告まとめを作成（問題ありのテキストから最大5件、揃った時点で走査を打ち切る）
     all_texts = [company_name_check, teleapo_response_check, longcall_check, customer_reaction_check, manner_check]
-    for text in all_texts:
-        if text and "問題あり" in text:
-            lines = text.split('\n')
-            for i, line in enumerate(lines):
-                if "報告" in line and ":" in line and i < len(lines) - 1:
-                    report = line.split(':', 1)[1].strip()
-                    if report and report != "なし" and len(報告まとめ) < 5:
-                        報告まとめ.append(report)
+    blob = "\x1e".join(text for text in all_texts if text and "問題あり" in text)
+    reports = (
+        report
+        for report in (match.group(1).strip() for match in _REPORT_RE.finditer(blob))
+        if report and report != "なし"
+    )
+    報告まとめ = list(itertools.islice(reports, 5))
     
     if not 報告まとめ:
         報告まとめ = ["特に問題は検出されませんでした"]